@@ -11,6 +11,9 @@ def main():
     # where to find game assets
     asset_path = "asset_packs/default.zip"
 
+    # set to a directory to record every frame of gameplay there
+    capture_path = None
+
     # create a game object and call it's run method to run the game
-    Game(resolution, fullscreen, asset_path).run()
+    Game(resolution, fullscreen, asset_path, capture_path).run()
 
@@ -0,0 +1,153 @@
+"""this file implements recording of the game's frames to disk without holding up the game"""
+from collections import namedtuple
+import datetime
+import threading
+import struct
+import queue
+import zlib
+import sys
+import os
+import pygame
+
+
+# statistics describing how recording is going, overhead is the average seconds per frame spent by the game
+CaptureStats = namedtuple('CaptureStats', 'written dropped overhead')
+
+
+class FrameRecorder(object):
+    """copies frames as they are drawn and hands them to background workers to be written to disk - if the
+    workers fall behind, frames are dropped rather than making the game wait"""
+
+    # each frame is written as its own numbered PNG image
+    PNG = "png"
+    # every frame is appended to a single file of raw RGB pixels, each preceded by a small header
+    RAW = "raw"
+
+    # header written before each raw frame: frame number, width, height
+    RAW_HEADER = struct.Struct("<III")
+
+    def __init__(self, path, file_format=PNG, workers=2, max_queued_frames=8):
+        """constructor, path is the directory to write frames to"""
+        self._path = path
+        self._format = file_format
+        os.makedirs(self._path, exist_ok=True)
+        # raw frames all go into one file, so writes to it have to take turns
+        self._raw_file = None
+        self._raw_lock = threading.Lock()
+        if self._format == FrameRecorder.RAW:
+            self._raw_file = open(os.path.join(self._path, "frames.raw"), "wb")
+        elif self._format != FrameRecorder.PNG:
+            raise Exception("unknown capture format: {}".format(self._format))
+        # statistics
+        self._frame_number = 0
+        self._dropped = 0
+        self._overhead = datetime.timedelta()
+        # frames written by the workers, which take turns to count them
+        self._written = 0
+        self._written_lock = threading.Lock()
+        # frames waiting to be written, bounded so a slow disk can't use up all our memory
+        self._queue = queue.Queue(maxsize=max_queued_frames)
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def capture(self, surface):
+        """takes a copy of the given surface to be written to disk in the background - the pixels are copied
+        as they are, converting them to RGB is left to the workers"""
+        started = datetime.datetime.now()
+        bytesize = surface.get_bytesize()
+        if bytesize in (3, 4):
+            pixels = surface.get_buffer().raw
+            pitch = surface.get_pitch()
+            # work out where in each pixel the red, green and blue bytes are
+            if sys.byteorder == "little":
+                offsets = tuple(shift // 8 for shift in surface.get_shifts()[:3])
+            else:
+                offsets = tuple(bytesize - 1 - shift // 8 for shift in surface.get_shifts()[:3])
+        else:
+            # pixels that don't fit in whole bytes per channel are left to pygame to convert
+            pixels = pygame.image.tobytes(surface, "RGB")
+            bytesize = 3
+            pitch = surface.get_width() * bytesize
+            offsets = 0, 1, 2
+        frame = self._frame_number, surface.get_size(), pitch, bytesize, offsets, pixels
+        self._frame_number += 1
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self._dropped += 1
+        self._overhead += datetime.datetime.now() - started
+
+    def stats(self):
+        """returns statistics describing how recording is going"""
+        overhead = 0.0
+        if self._frame_number > 0:
+            overhead = self._overhead.total_seconds() / self._frame_number
+        return CaptureStats(self._written, self._dropped, overhead)
+
+    def close(self):
+        """waits for all queued frames to be written, then stops the workers"""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        if self._raw_file is not None:
+            self._raw_file.close()
+
+    def _work(self):
+        """loop run by each background worker, writing frames until told to stop"""
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            self._write(*frame)
+
+    def _write(self, frame_number, size, pitch, bytesize, offsets, pixels):
+        """writes a single frame to disk"""
+        pixels = FrameRecorder._to_rgb(size, pitch, bytesize, offsets, pixels)
+        if self._format == FrameRecorder.PNG:
+            with open(os.path.join(self._path, "frame_{:06d}.png".format(frame_number)), "wb") as png_file:
+                png_file.write(FrameRecorder._encode_png(size, pixels))
+        else:
+            with self._raw_lock:
+                self._raw_file.write(FrameRecorder.RAW_HEADER.pack(frame_number, size[0], size[1]))
+                self._raw_file.write(pixels)
+        with self._written_lock:
+            self._written += 1
+
+    @staticmethod
+    def _to_rgb(size, pitch, bytesize, offsets, pixels):
+        """converts pixels copied straight from a surface into tightly packed RGB, given the bytes from the start
+        of one row to the next (pitch), the bytes per pixel and where in each pixel the red, green and blue are"""
+        width, height = size
+        row_bytes = width * bytesize
+        # drop any padding at the end of each row
+        if pitch != row_bytes:
+            pixels = b"".join(pixels[y * pitch:y * pitch + row_bytes] for y in range(height))
+        if bytesize == 3 and offsets == (0, 1, 2):
+            return pixels
+        rgb = bytearray(width * height * 3)
+        for channel, offset in enumerate(offsets):
+            rgb[channel::3] = pixels[offset::bytesize]
+        return bytes(rgb)
+
+    @staticmethod
+    def _encode_png(size, pixels):
+        """encodes raw RGB pixels as a PNG image - done by hand rather than with pygame.image.save because
+        zlib lets other threads run while it compresses, so the game isn't held up"""
+        width, height = size
+        stride = width * 3
+        # each row of pixels is preceded by a byte saying which filter it uses (0 = none)
+        rows = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+
+        def chunk(chunk_type, data):
+            return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+        # 8 bits per channel, colour type 2 (RGB), default compression, filtering and no interlacing
+        header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+        return b"".join([
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", header),
+            chunk(b"IDAT", zlib.compress(rows, 1)),
+            chunk(b"IEND", b""),
+        ])
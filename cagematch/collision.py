@@ -0,0 +1,30 @@
+"""this file provides collision tests that are more involved than a simple rect overlap"""
+
+
+def swept_collision(start, end, target):
+    """determines whether a rect moving in a straight line from the start rect to the end rect
+    overlaps the (stationary) target rect at any point along the way - this is needed so that fast
+    moving objects can't skip straight over something between two simulation updates. If the target
+    moved too, pass the target where it started and the end rect less however far the target moved"""
+    # grow the target by the size of the moving rect, so we can treat the moving rect's top left
+    # corner as a single point travelling along a line (a ray) from start to end
+    low_x, high_x = target.left - start.w, target.right
+    low_y, high_y = target.top - start.h, target.bottom
+    # track the portion of the journey (0.0 = start, 1.0 = end) spent inside the grown target
+    enter, leave = 0.0, 1.0
+    for origin, delta, low, high in ((start.x, end.x - start.x, low_x, high_x),
+                                     (start.y, end.y - start.y, low_y, high_y)):
+        if delta == 0:
+            # not moving on this axis, so we're either always overlapping on it or never
+            if not low < origin < high:
+                return False
+        else:
+            # work out when we cross into and out of the target on this axis
+            t_low = (low - origin) / delta
+            t_high = (high - origin) / delta
+            enter = max(enter, min(t_low, t_high))
+            leave = min(leave, max(t_low, t_high))
+            # if we leave before we enter, the overlaps on each axis never happen at the same time
+            if enter >= leave:
+                return False
+    return True
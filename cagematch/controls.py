@@ -0,0 +1,66 @@
+"""this file turns keyboard and joystick state into the controls the game cares about"""
+from collections import namedtuple
+import pygame
+
+
+# the state of the controls at one moment, horizontal ranges from -1.0 (full left) to 1.0 (full right)
+InputFrame = namedtuple('InputFrame', 'horizontal shoot')
+
+# which keys, joystick axes and joystick buttons map to each control
+Bindings = namedtuple('Bindings', 'left_keys right_keys shoot_keys axis shoot_buttons dead_zone')
+
+DEFAULT_BINDINGS = Bindings(
+    left_keys=(pygame.K_LEFT, pygame.K_a),
+    right_keys=(pygame.K_RIGHT, pygame.K_d),
+    shoot_keys=(pygame.K_SPACE,),
+    axis=0,
+    shoot_buttons=(0,),
+    # how far an axis must be pushed before it counts, so worn sticks don't cause drifting
+    dead_zone=0.2,
+)
+
+
+class InputSampler(object):
+    """reads the keyboard and any joysticks once per simulation update, producing an InputFrame"""
+
+    def __init__(self, bindings=DEFAULT_BINDINGS):
+        """constructor, note that pygame must be initialised before any joysticks can be found"""
+        self._bindings = bindings
+        self._joysticks = []
+        self.refresh_joysticks()
+
+    def refresh_joysticks(self):
+        """finds all connected joysticks, should be called when joysticks are plugged in or removed"""
+        self._joysticks = [pygame.joystick.Joystick(index) for index in range(pygame.joystick.get_count())]
+
+    def sample(self):
+        """reads the current state of all inputs into an InputFrame"""
+        bindings = self._bindings
+        horizontal = 0.0
+        shoot = False
+
+        # keyboard input
+        keys = pygame.key.get_pressed()
+        if any(keys[key] for key in bindings.left_keys):
+            horizontal -= 1.0
+        if any(keys[key] for key in bindings.right_keys):
+            horizontal += 1.0
+        if any(keys[key] for key in bindings.shoot_keys):
+            shoot = True
+
+        # controller input
+        for joystick in self._joysticks:
+            if bindings.axis < joystick.get_numaxes():
+                position = joystick.get_axis(bindings.axis)
+                if abs(position) >= bindings.dead_zone:
+                    horizontal += position
+            if joystick.get_numhats() > 0:
+                horizontal += joystick.get_hat(0)[0]
+            if any(button < joystick.get_numbuttons() and joystick.get_button(button)
+                   for button in bindings.shoot_buttons):
+                shoot = True
+
+        # clamp the output to the full range
+        horizontal = max(min(1.0, horizontal), -1.0)
+
+        return InputFrame(horizontal, shoot)
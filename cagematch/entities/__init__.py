@@ -1,6 +1,7 @@
 
 
-from .entity import Entity, EntityContainer
-from .projectiles import Projectile
+from .archetype import Archetype
+from .projectiles import Projectiles
 from .player import Player
-from .enemy import Enemy, EnemyController
+from .enemy import EnemyController
+from . import systems
@@ -0,0 +1,88 @@
+"""this file describes an archetype, storage for every entity of one kind laid out in columns"""
+from .. import events
+import pygame
+
+
+class Archetype(object):
+    """stores every entity of one kind as a set of columns (one list per property, one row per entity),
+    so that systems can update all of them in bulk rather than calling methods on each entity"""
+
+    def __init__(self, size, event_queue):
+        """constructor, size is the (width, height) shared by every entity of this kind, deaths
+        are posted to the given event queue"""
+        self.size = size
+        self._events = event_queue
+        # position of the top left corner of each entity
+        self.x = []
+        self.y = []
+        # position of each entity before it last moved (see systems.move)
+        self.prev_x = []
+        self.prev_y = []
+        # velocity of each entity (in pixels per second)
+        self.vx = []
+        self.vy = []
+        # the animated sprite sheet each entity is drawn with
+        self.sprite = []
+        # whether each row holds a living entity
+        self.alive = []
+        # callbacks to alert someone to an entity dying
+        self.on_death = []
+        # rows of dead entities that can be reused by the next spawn
+        self._free_rows = []
+
+    def spawn(self, pos, velocity, sprite, on_death=None):
+        """adds a living entity, reusing the row of a dead one if possible, and returns its row"""
+        if on_death is None:
+            on_death = lambda row: None
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self.x[row], self.y[row] = pos
+            self.prev_x[row], self.prev_y[row] = pos
+            self.vx[row], self.vy[row] = velocity
+            self.sprite[row] = sprite
+            self.alive[row] = True
+            self.on_death[row] = on_death
+        else:
+            row = len(self.alive)
+            self.x.append(pos[0])
+            self.y.append(pos[1])
+            self.prev_x.append(pos[0])
+            self.prev_y.append(pos[1])
+            self.vx.append(velocity[0])
+            self.vy.append(velocity[1])
+            self.sprite.append(sprite)
+            self.alive.append(True)
+            self.on_death.append(on_death)
+        return row
+
+    def kill(self, row):
+        """marks the entity in the given row as dead, its death callback is alerted once the event is handled"""
+        if self.alive[row]:
+            self.alive[row] = False
+            self._free_rows.append(row)
+            self._events.post(events.DIED, self.on_death[row], row)
+
+    def restore(self, x, y):
+        """brings every entity back to life at the given positions (one per row), reusing the rows as they are"""
+        self.x[:] = x
+        self.y[:] = y
+        self.prev_x[:] = x
+        self.prev_y[:] = y
+        self.alive[:] = [True] * len(self.alive)
+        self._free_rows = []
+
+    def rows(self):
+        """returns the rows that hold living entities"""
+        return [row for row, alive in enumerate(self.alive) if alive]
+
+    def count(self):
+        """returns how many living entities there are"""
+        return self.alive.count(True)
+
+    def rect(self, row):
+        """returns a rect describing where the entity in the given row is"""
+        return pygame.Rect(int(self.x[row]), int(self.y[row]), self.size[0], self.size[1])
+
+    def prev_rect(self, row):
+        """returns a rect describing where the entity in the given row was before it last moved"""
+        return pygame.Rect(int(self.prev_x[row]), int(self.prev_y[row]), self.size[0], self.size[1])
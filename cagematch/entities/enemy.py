@@ -1,26 +1,42 @@
-"""code pertaining to the playable entity in the game"""
+"""code pertaining to the enemies in the game"""
 from ..spritesheet import AnimatedSpriteSheet, Animation
-from .entity import Entity, EntityContainer
+from .archetype import Archetype
+from . import systems
 import random
 import pygame
 
 
-class EnemyController(EntityContainer):
+class EnemyController(object):
     """manages a collection of enemies' behaviour"""
 
-    def __init__(self, resolution, starting_speed, max_speed, shoot_method, advance_speed=2):
-        """constructor"""
-        super().__init__()
-        # decide the initial direction of enemies
-        self._current_direction = random.choice([Enemy.RIGHT, Enemy.LEFT])
+    # represent directions of movement, enemies in this game just slide left and right
+    # together, so the controller decides which direction they all go
+    LEFT = 0
+    RIGHT = 1
+
+    def __init__(self, resolution, shoot_method, event_queue):
+        """constructor, note that enemies don't move until reset() is called"""
+        # storage for every enemy
+        self._entities = Archetype((64, 64), event_queue)
+        # the animated sprite shared by every enemy, created by populate()
+        self._sprite = None
+        # where each enemy starts a level, worked out once by populate()
+        self._formation_x = []
+        self._formation_y = []
+        # movement parameters, set for each level by reset()
+        self._current_direction = EnemyController.LEFT
+        self._current_speed = 0
+        self._max_speed = 0
+        self._advance_speed = 0
+        # whether the last enemy standing has been sped up yet
+        self._last_enemy_sped_up = False
         # store  parameters
-        self._current_speed = starting_speed
-        self._max_speed = max_speed
-        self._advance_speed = advance_speed
         self._shoot_method = shoot_method
         # number of bullets in the air from enemies
         self._bullets_flying = 0
         self._max_flying_bullets = 1
+        # chance of firing per second
+        self._shots_per_second = 0.5
         # figure out the bounds of where enemies can move
         space_ratio = 0.05
         bound_x, bound_y = resolution[0] * space_ratio, resolution[1] * space_ratio
@@ -28,8 +44,19 @@ class EnemyController(EntityContainer):
         bound_h = resolution[1] * (1.0 - 2.0 * space_ratio)
         self._bounds = pygame.Rect(bound_x, bound_y, bound_w, bound_h)
 
+    @property
+    def entities(self):
+        """the archetype storing every enemy"""
+        return self._entities
+
     def populate(self, rows, columns, x_spacing, y_spacing, sprite_sheet):
         """generate a collection of enemies given a number and spacing between them"""
+        # all enemies animate in step, so they can share one animated sprite
+        self._sprite = AnimatedSpriteSheet(sprite_sheet, self._entities.size)
+        self._sprite.add_animation("test", Animation([
+            0, 1
+        ], 4))
+        self._sprite.set_animation("test")
         width = columns * x_spacing
         start_x = self._bounds.centerx - width / 2
         start_y = self._bounds.top
@@ -37,32 +64,50 @@ class EnemyController(EntityContainer):
             for x in range(columns):
                 spawn_x = start_x + x_spacing * x
                 spawn_y = start_y + y_spacing * y
-                enemy = Enemy((spawn_x, spawn_y), sprite_sheet)
-                self.add(enemy)
+                self._entities.spawn((spawn_x, spawn_y), (0, 0), self._sprite, self._enemy_died)
+        # remember the formation, so every level can start from it
+        self._formation_x = list(self._entities.x)
+        self._formation_y = list(self._entities.y)
+
+    def reset(self, starting_speed, max_speed, advance_speed):
+        """starts a new level by bringing every enemy back to life in formation with the given speeds - the
+        existing enemies are reused rather than replaced, so this is cheap however many enemies there are"""
+        self._entities.restore(self._formation_x, self._formation_y)
+        # decide the initial direction of enemies
+        self._current_direction = random.choice([EnemyController.RIGHT, EnemyController.LEFT])
+        self._current_speed = starting_speed
+        self._max_speed = max_speed
+        self._advance_speed = advance_speed
+        self._last_enemy_sped_up = False
+        self._update_velocity()
 
-    def add(self, entity):
-        """override 'add entity to container' behaviour to set their movement/speed to match all enemies"""
-        super().add(entity)
-        entity.set_movement(self._current_direction, self._current_speed)
-        entity.set_death_callback(self._enemy_died)
+    def set_animation_period_scale(self, scale):
+        """sets the multiplier applied to the period of the enemies' animation"""
+        if self._sprite is not None:
+            self._sprite.set_period_scale(scale)
+
+    def set_shooting(self, max_flying_bullets, shots_per_second):
+        """sets how many enemy bullets can be in the air at once and how often enemies try to shoot"""
+        self._max_flying_bullets = max_flying_bullets
+        self._shots_per_second = shots_per_second
 
     def think(self, dt):
         """simulation event"""
-        # update all contained entities
-        super().think(dt)
-        if len(self._entities) > 0:
+        if self._entities.count() > 0:
+            # move all enemies
+            systems.move(self._entities, dt)
             self._check_for_direction_change()
-            self._attempt_shooting()
+            self._attempt_shooting(dt)
 
     def _check_for_direction_change(self):
         """checks to see if enemies need to change direction"""
         # decide whether the enemies need to change direction
         turn_around = False
-        if self._current_direction == Enemy.LEFT:
+        if self._current_direction == EnemyController.LEFT:
             left_most = self._find_leftmost()
             if left_most < self._bounds.left:
                 turn_around = True
-        elif self._current_direction == Enemy.RIGHT:
+        elif self._current_direction == EnemyController.RIGHT:
             right_most = self._find_rightmost()
             if right_most > self._bounds.right:
                 turn_around = True
@@ -72,12 +117,12 @@ class EnemyController(EntityContainer):
         if turn_around:
             self._change_direction()
 
-    def _attempt_shooting(self):
+    def _attempt_shooting(self, dt):
         """checks to see if any enemies should fire at the player"""
         if self._bullets_flying < self._max_flying_bullets:
-            if random.random() <= 0.005:
-                firing = random.choice(self._entities)
-                bullet_origin = firing._rect.midbottom
+            if random.random() <= self._shots_per_second * dt:
+                firing = random.choice(self._entities.rows())
+                bullet_origin = self._entities.rect(firing).midbottom
                 self._bullets_flying += 1
                 self._shoot_method(bullet_origin, self._bullet_died)
 
@@ -88,110 +133,44 @@ class EnemyController(EntityContainer):
 
     def _find_leftmost(self):
         """identifies which enemy is the furthest left, and returns the x position of their leading edge"""
-        leftmost = None
-        for entity in self._entities:
-            if leftmost is None or entity.leading_edge < leftmost.leading_edge:
-                leftmost = entity
-        if leftmost is None:
+        rows = self._entities.rows()
+        if not rows:
             return None
-        else:
-            return leftmost.leading_edge
+        return min(self._entities.x[row] for row in rows)
 
     def _find_rightmost(self):
         """identifies which enemy is furthest right, and returns the x position of their leading edge"""
-        rightmost = None
-        for entity in self._entities:
-            if rightmost is None or entity.leading_edge > rightmost.leading_edge:
-                rightmost = entity
-        if rightmost is None:
+        rows = self._entities.rows()
+        if not rows:
             return None
-        else:
-            return rightmost.leading_edge
+        return max(self._entities.x[row] for row in rows) + self._entities.size[0]
 
     def _change_direction(self):
         """changes the direction of all enemies, increases their speed and advances them down the screen"""
-        if self._current_direction == Enemy.LEFT:
-            self._current_direction = Enemy.RIGHT
+        if self._current_direction == EnemyController.LEFT:
+            self._current_direction = EnemyController.RIGHT
         else:
-            self._current_direction = Enemy.LEFT
+            self._current_direction = EnemyController.LEFT
         if self._current_speed < self._max_speed:
-            self._current_speed += 0.1
-        for enemy in self._entities:
-            enemy.set_movement(self._current_direction, self._current_speed)
-            enemy.advance(self._advance_speed)
+            self._current_speed += 10
+        self._update_velocity()
+        # advance down the screen
+        self._entities.y[:] = [y + self._advance_speed for y in self._entities.y]
+
+    def _update_velocity(self):
+        """sets the velocity of all enemies to match the current direction and speed"""
+        if self._current_direction == EnemyController.LEFT:
+            vx = -self._current_speed
+        else:
+            vx = self._current_speed
+        self._entities.vx[:] = [vx] * len(self._entities.vx)
 
     def _enemy_died(self, enemy):
         """callback when an enemy dies, used to make the last enemy speed up"""
         _ = enemy
-        if len(self._entities) == 2:
+        # several enemies can die in the same update, so make sure we only speed up once
+        if self._entities.count() == 1 and not self._last_enemy_sped_up:
             print("last enemy!")
+            self._last_enemy_sped_up = True
             self._current_speed *= 2
-            self._entities[0].set_movement(self._current_direction, self._current_speed)
-
-
-class Enemy(Entity):
-    """this object represents the enemy entities in the game"""
-
-    # represent directions of movement, enemies in this game just slide left and right
-    # something external will tell them which direction to go
-    LEFT = 0
-    RIGHT = 1
-    # the default movement speed
-    DEFAULT_SPEED = 1
-
-    def __init__(self, pos, sprite_sheet):
-        """constructor"""
-        super().__init__()
-
-        # default direction & speed
-        self._direction = Enemy.LEFT
-        self._speed = Enemy.DEFAULT_SPEED
-
-        # figure out spawn position
-        size = 64, 64
-        # store a floating point x position as well as rect, so we can manually implement
-        # smoother movement slower than 1 pixel per simulation update
-        self._real_xpos = float(pos[0])
-        self._rect = pygame.Rect(pos, size)
-
-        self._sprite = AnimatedSpriteSheet(sprite_sheet, size)
-        self._sprite.add_animation("test", Animation([
-            0, 1
-        ], 4))
-        self._sprite.set_animation("test")
-
-    @property
-    def leading_edge(self):
-        """returns the x position of the leading edge of the enemy"""
-        if self._direction == Enemy.LEFT:
-            return self._rect.x
-        else:
-            return self._rect.x + self._rect.w
-
-    def advance(self, amount):
-        """advances the enemy down the screen by an amount"""
-        self._rect.move_ip(0, amount)
-
-    def set_movement(self, direction, speed):
-        """set properties of the enemies movement (direction & speed)"""
-        self._direction = direction
-        self._speed = speed
-
-    def render(self, bounds, dest):
-        """render event"""
-        self._sprite.draw(dest, self._rect.x, self._rect.y)
-        # pygame.draw.rect(dest, (0, 255, 0), self._rect)
-
-    def think(self, dt):
-        """simulation event"""
-        dx = 0
-        # if we should be going left, set delta x to left
-        if self._direction == Enemy.LEFT:
-            dx -= self._speed
-        # otherwise right
-        elif self._direction == Enemy.RIGHT:
-            dx += self._speed
-        # move
-        self._real_xpos += dx
-        self._rect.x = int(self._real_xpos)
-
+            self._update_velocity()
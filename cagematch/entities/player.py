@@ -2,12 +2,12 @@
 
 
 from ..spritesheet import Animation, AnimatedSpriteSheet
-from .entity import Entity
-import datetime
+from .archetype import Archetype
+from . import systems
 import pygame
 
 
-class Player(Entity):
+class Player(object):
     """this object represents the player entity in the game"""
 
     # single bullet means only one bullet exists at a time
@@ -15,10 +15,8 @@ class Player(Entity):
     # fire rate means you can fire bullets up to a fixed rate
     FIRE_RATE = 1
 
-    def __init__(self, resolution, shoot_method, sprite):
+    def __init__(self, resolution, shoot_method, sprite, event_queue):
         """constructor"""
-        super().__init__()
-
         size = 64, 64
 
         # store parameters
@@ -33,46 +31,62 @@ class Player(Entity):
         start_x = (resolution[0] - size[0]) / 2
         start_y = resolution[1] - 2 * size[1]
         self._start_pos = start_x, start_y
-        self._rect = pygame.Rect(self._start_pos, size)
+        # the player is stored like every other entity, just with a single row
+        self._entities = Archetype(size, event_queue)
+        self._row = self._entities.spawn(self._start_pos, (0, 0), self._sprite)
 
         # derive where we can move
         self._player_bounds = pygame.Rect(size[0], start_y, resolution[0] - size[0] * 2, size[1])
 
         # setup fields for controlling shooting
         self._shooting_type = Player.SINGLE_BULLET
-        # rate based shooting
+        # rate based shooting, timed in simulation seconds so shots land on the same updates however fast the game runs
         self._fire_rate = 5.0
-        self._fire_period = datetime.timedelta(seconds=1.0/self._fire_rate)
-        self._can_fire_after = datetime.datetime.now()
+        self._fire_period = 1.0 / self._fire_rate
+        self._fire_cooldown = 0.0
         # single bullet allowed shooting
         self._bullet_exists = False
 
-    def render(self, bounds, dest):
-        """render event"""
-        self._sprite.draw(dest, self._rect.x, self._rect.y)
-        # pygame.draw.rect(dest, (255, 0, 0), self._rect)
+    @property
+    def entities(self):
+        """the archetype storing the player"""
+        return self._entities
+
+    def set_animation_period_scale(self, scale):
+        """sets the multiplier applied to the period of the player's animation"""
+        self._sprite.set_period_scale(scale)
+
+    def set_shooting_type(self, shooting_type):
+        """sets how shooting is limited, either Player.SINGLE_BULLET or Player.FIRE_RATE"""
+        self._shooting_type = shooting_type
 
-    def think(self, dt):
-        """simulation event"""
-        max_speed = 3
+    def think(self, dt, controls):
+        """simulation event, controls is the InputFrame sampled for this update"""
+        # in pixels per second
+        max_speed = 300
         # see if we need to move around
-        dx = Player._horizontal_movement(max_speed)
-        self._rect.move_ip(dx, 0)
+        self._entities.vx[self._row] = controls.horizontal * max_speed
+        systems.move(self._entities, dt)
         # ensure we don't wander off the screen
-        self._rect.clamp_ip(self._player_bounds)
+        left_limit = self._player_bounds.left
+        right_limit = self._player_bounds.right - self._entities.size[0]
+        self._entities.x[self._row] = min(max(self._entities.x[self._row], left_limit), right_limit)
+        # count down to when we can next shoot
+        self._fire_cooldown = max(self._fire_cooldown - dt, 0.0)
         # see if we should fire bullets
-        if self._can_shoot() and Player._should_shoot():
-            bullet_origin = self._rect.midtop
+        if self._can_shoot() and controls.shoot:
+            bullet_origin = self._entities.rect(self._row).midtop
             # record the fact the bullet exists
             self._bullet_exists = True
             # request that a bullet is shot, and that we're told when it dies
             self._shoot_method(bullet_origin, self._bullet_died)
-            # set when we can next shoot
-            self._can_fire_after = datetime.datetime.now() + self._fire_period
+            # set how long until we can next shoot
+            self._fire_cooldown = self._fire_period
 
     def recenter(self):
         """used to set the player back to the starting position"""
-        self._rect.topleft = self._start_pos
+        self._entities.x[self._row], self._entities.y[self._row] = self._start_pos
+        self._entities.prev_x[self._row], self._entities.prev_y[self._row] = self._start_pos
 
     def _bullet_died(self, bullet):
         """callback is fired when a fired bullet is deleted from game"""
@@ -84,42 +98,9 @@ class Player(Entity):
         """determines whether we can actually fire yet"""
         if self._shooting_type == Player.FIRE_RATE:
             # if we're firing up to a rate, see if enough time has passed since last shot
-            now = datetime.datetime.now()
-            return now >= self._can_fire_after
+            return self._fire_cooldown <= 0.0
         elif self._shooting_type == Player.SINGLE_BULLET:
             # if we can only fire once, see if our bullet still exists
             return not self._bullet_exists
         else:
             print("invalid shoot method: {}".format(self._shoot_method))
-
-    @staticmethod
-    def _should_shoot():
-        """determines whether the input for 'shoot' has been given"""
-        result = False
-
-        # is shoot key pressed?
-        if pygame.key.get_pressed()[pygame.K_SPACE]:
-            result = True
-
-        # TODO: controller support here
-
-        return result
-
-    @staticmethod
-    def _horizontal_movement(max_speed):
-        """returns how fast to move horizontally up to max speed in either direction"""
-        result = 0
-
-        # keyboard input
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            result -= max_speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            result += max_speed
-
-        # TODO: add controller support here?
-
-        # clamp the output to the max speed
-        result = max(min(max_speed, result), -max_speed)
-
-        return result
@@ -1,43 +1,28 @@
 """code pertaining to projectiles in the game"""
 
 from ..spritesheet import AnimatedSpriteSheet, Animation
-from .entity import Entity
-import pygame
+from .archetype import Archetype
 
 
-class Projectile(Entity):
-    """an entity that is a projectile"""
+class Projectiles(Archetype):
+    """all of the projectiles fired by one side of the game"""
 
-    def __init__(self, pos, velocity, appearance, sprite):
+    def __init__(self, sprite, event_queue):
         """constructor"""
-        super().__init__()
         size = 10, 10
-        # set up sprite and animation
+        super().__init__(size, event_queue)
+        # set up sprite and animation, shared by every projectile
         self._sprite = AnimatedSpriteSheet(sprite, size)
         self._sprite.add_animation("test", Animation([
             0, 1
         ], 3))
         self._sprite.set_animation("test")
-        # create a rectangle to represent ourselves
-        self._rect = pygame.Rect(pos, size)
-        # centre the rectangle on the spawn position
-        self._rect.center = pos
-        # remember our velocity
-        self._vel = velocity
-        # store some appearance information
-        self._appearance = appearance
 
-    def think(self, dt):
-        """simulation event"""
-        # just move based on our velocity
-        self._rect.move_ip(self._vel)
+    def fire(self, origin, velocity, death_callback):
+        """spawns a projectile centred on the origin, moving with the given velocity (in pixels per second)"""
+        pos = origin[0] - self.size[0] / 2, origin[1] - self.size[1] / 2
+        return self.spawn(pos, velocity, self._sprite, death_callback)
 
-    def render(self, bounds, dest):
-        """render event"""
-        # if we leave the visible screen, flag ourselves as dead
-        if not bounds.colliderect(self._rect):
-            self.die()
-        # otherwise draw ourself
-        else:
-            self._sprite.draw(dest, self._rect.x, self._rect.y)
-            # pygame.draw.rect(dest, self._appearance, self._rect)
+    def set_animation_period_scale(self, scale):
+        """sets the multiplier applied to the period of the projectiles' animation"""
+        self._sprite.set_period_scale(scale)
@@ -0,0 +1,64 @@
+"""this file implements systems, operations applied in bulk to every entity in an archetype"""
+from ..collision import swept_collision
+import math
+
+
+def move(archetype, dt):
+    """moves every entity by its velocity, remembering where it was before the move"""
+    archetype.prev_x[:] = archetype.x
+    archetype.prev_y[:] = archetype.y
+    archetype.x[:] = [x + vx * dt for x, vx in zip(archetype.x, archetype.vx)]
+    archetype.y[:] = [y + vy * dt for y, vy in zip(archetype.y, archetype.vy)]
+
+
+def cull(archetype, bounds):
+    """kills every entity that has left the given bounds"""
+    for row in archetype.rows():
+        if not bounds.colliderect(archetype.rect(row)):
+            archetype.kill(row)
+
+
+def collide(movers, targets, event_queue, kind):
+    """checks every entity in the movers archetype for collision with every entity in the targets
+    archetype, posting an event of the given kind with the row of each entity as the arguments - the
+    whole path each mover took during its last move is checked, so fast movers can't skip over targets,
+    and collisions are pixel-accurate, so transparent parts of sprites don't count"""
+    # targets move too, so each mover's path is checked relative to the target: as though the target stood
+    # still where it started while the mover made its own move minus the target's
+    target_moves = [(row, targets.prev_rect(row), targets.rect(row)) for row in targets.rows()]
+    for mover in movers.rows():
+        start = movers.prev_rect(mover)
+        end = movers.rect(mover)
+        for target, target_start, target_end in target_moves:
+            relative_end = end.move(target_start.x - target_end.x, target_start.y - target_end.y)
+            # the rects are a cheap first check, only compare pixels if they touched
+            if swept_collision(start, relative_end, target_start) and \
+                    _masks_collide(movers, mover, targets, target):
+                event_queue.post(kind, mover, target)
+                break
+
+
+def _masks_collide(movers, mover, targets, target):
+    """checks whether the sprites of a mover and a target overlapped anywhere along their last moves"""
+    mover_mask = movers.sprite[mover].current_mask()
+    target_mask = targets.sprite[target].current_mask()
+    # where the mover started relative to the target, and how far it moved relative to the target
+    start_x = movers.prev_x[mover] - targets.prev_x[target]
+    start_y = movers.prev_y[mover] - targets.prev_y[target]
+    dx = (movers.x[mover] - movers.prev_x[mover]) - (targets.x[target] - targets.prev_x[target])
+    dy = (movers.y[mover] - movers.prev_y[mover]) - (targets.y[target] - targets.prev_y[target])
+    # step along the path a pixel at a time, so no overlap can be stepped over
+    steps = max(1, int(math.ceil(max(abs(dx), abs(dy)))))
+    for step in range(steps + 1):
+        offset = int(start_x + dx * step / steps), int(start_y + dy * step / steps)
+        if target_mask.overlap(mover_mask, offset):
+            return True
+    return False
+
+
+def render(archetype, dest):
+    """draws every entity to the target surface, returning the areas drawn to"""
+    return [
+        archetype.sprite[row].draw(dest, int(archetype.x[row]), int(archetype.y[row]))
+        for row in archetype.rows()
+    ]
@@ -0,0 +1,45 @@
+"""this file implements a queue of gameplay events, so they can be handled together after a simulation update"""
+import collections
+
+
+# an entity died, arguments are its death callback and the row it was stored in
+DIED = "died"
+# a player bullet hit an enemy, arguments are the rows of the bullet and the enemy
+ENEMY_SHOT = "enemy_shot"
+# an enemy bullet hit the player, arguments are the rows of the bullet and the player
+PLAYER_SHOT = "player_shot"
+# an enemy reached the player, arguments are the rows of the enemy and the player
+PLAYER_REACHED = "player_reached"
+
+
+class EventQueue(object):
+    """collects events posted while the simulation is updating, then hands them to their handlers in one go"""
+
+    def __init__(self):
+        """constructor"""
+        self._pending = []
+        self._handlers = collections.defaultdict(list)
+        # how many of each kind of event have been handled (see take_counts())
+        self._counts = collections.Counter()
+
+    def subscribe(self, kind, handler):
+        """asks for the handler to be called with the event's arguments whenever an event of the given kind is handled"""
+        self._handlers[kind].append(handler)
+
+    def post(self, kind, *args):
+        """queues up an event to be handled by the next call to dispatch()"""
+        self._pending.append((kind, args))
+
+    def dispatch(self):
+        """handles every queued event, including any posted by handlers while doing so"""
+        while self._pending:
+            batch, self._pending = self._pending, []
+            for kind, args in batch:
+                self._counts[kind] += 1
+                for handler in self._handlers[kind]:
+                    handler(*args)
+
+    def take_counts(self):
+        """returns how many of each kind of event have been handled since this function was last called"""
+        counts, self._counts = self._counts, collections.Counter()
+        return counts
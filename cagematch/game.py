@@ -1,56 +1,86 @@
 """this file implements the top level game object that pulls together the rest of the code into one game"""
-from .entities import EntityContainer, Player, Projectile, EnemyController
+from .entities import Player, Projectiles, EnemyController, systems
 from collections import namedtuple
+from .governor import QualityGovernor
+from .controls import InputSampler
+from .capture import FrameRecorder
+import asyncio
+from .events import EventQueue
+from . import events
 from .resources import Resources
 from .ticker import Ticker
+import datetime
 import pygame
 
 
 DifficultySettings = namedtuple('DifficultySettings', 'speed max_speed advance_rate')
+Formation = namedtuple('Formation', 'rows columns x_spacing y_spacing')
+
+# the layout of enemies at the start of each level
+DEFAULT_FORMATION = Formation(4, 6, 96, 96)
 
 
 class Game(object):
     """this is the top level game object, the game is operated from here"""
 
-    def __init__(self, resolution, fullscreen, asset_path):
-        """constructor that initialises the game"""
+    def __init__(self, resolution, fullscreen, asset_path, capture_path=None, capture_format=FrameRecorder.PNG,
+                 formation=DEFAULT_FORMATION):
+        """constructor that initialises the game, if a capture path is given every frame is recorded there"""
         # store parameters
         self._resolution = resolution
         self._fullscreen = fullscreen
         # flag for whether game is still running (see run())
         self._running = False
 
+        # initialise pygame and create the window
+        pygame.init()
+        flags = 0
+        if self._fullscreen:
+            flags = flags or pygame.FULLSCREEN
+        self._screen = pygame.display.set_mode(self._resolution, flags)
+
+        # images are loaded after the window is created, so they can be converted to its pixel format
         self._resources = Resources(asset_path)
+        self._resources.prefetch(["player.png", "enemy.png", "player_bullet.png", "enemy_bullet.png"])
         self._player_sprite = self._resources.get_image("player.png")
         self._enemy_sprite = self._resources.get_image("enemy.png")
         self._player_bullet_sprite = self._resources.get_image("player_bullet.png")
         self._enemy_bullet_sprite = self._resources.get_image("enemy_bullet.png")
 
-        self._default_difficulty = DifficultySettings(1, 8, 2)
+        # speeds are in pixels per second, advance rate is in pixels per change of direction
+        self._default_difficulty = DifficultySettings(100, 800, 2)
 
         # difficulty variables
         self._current_difficulty = self._default_difficulty
-        self._rows = 4
-        self._columns = 6
-        self._xspacing = 96
-        self._yspacing = self._xspacing
+        self._formation = formation
+
+        # gameplay events (collisions, deaths, ...) are queued up during each simulation update
+        # and only handled once every entity has been updated
+        self._events = EventQueue()
+        self._events.subscribe(events.DIED, self._entity_died)
+        self._events.subscribe(events.ENEMY_SHOT, self._enemy_shot_by_bullet)
+        self._events.subscribe(events.PLAYER_SHOT, self._player_shot_by_bullet)
+        self._events.subscribe(events.PLAYER_REACHED, self._player_reached_by_enemies)
+        # set when the player loses, so the game is reset once all events have been handled
+        self._player_has_lost = False
 
-        # all game entities (players, enemies, ...)
-        self._entities = EntityContainer()
         # player bullets
-        self._player_bullets = EntityContainer(die_on_empty=False)
+        self._player_bullets = Projectiles(self._player_bullet_sprite, self._events)
         # enemy bullets
-        self._enemy_bullets = EntityContainer(die_on_empty=False)
+        self._enemy_bullets = Projectiles(self._enemy_bullet_sprite, self._events)
+        # create the enemies, they're reused for every level
+        self._enemies = EnemyController(self._resolution, self._enemy_shoot, self._events)
+        self._enemies.populate(
+            self._formation.rows,
+            self._formation.columns,
+            self._formation.x_spacing,
+            self._formation.y_spacing,
+            self._enemy_sprite
+        )
         # configure the first level
         self._start_level()
         # add player to game
-        self._player = Player(self._resolution, self._player_shoot, self._player_sprite)
-        self._entities.add(self._player)
-        # add enemy container to game
-        self._entities.add(self._enemies)
-        # add bullet container to game
-        self._entities.add(self._player_bullets)
-        self._entities.add(self._enemy_bullets)
+        self._player = Player(self._resolution, self._player_shoot, self._player_sprite, self._events)
 
         # what's a game without POINTS!?
         self._score = 0
@@ -58,27 +88,37 @@ class Game(object):
 
         # configuration for the game's "tickers" (periodically recurring events)
         desired_fps = 60.0
-        desired_lps = 100.0
+        # projectiles use swept collision tests, so the simulation doesn't need to run any faster than we draw
+        desired_lps = 60.0
         seconds_between_stats = 10.0
         # initialise the tickers
-        self._render_ticker = Ticker.from_frequency(desired_fps)
+        self._render_period = datetime.timedelta(seconds=1.0/desired_fps)
+        self._stats_period = datetime.timedelta(seconds=seconds_between_stats)
+        self._render_ticker = Ticker(self._render_period)
         self._logic_ticker = Ticker.from_frequency(desired_lps)
-        self._stats_ticker = Ticker.from_seconds(seconds_between_stats)
+        self._stats_ticker = Ticker(self._stats_period)
+
+        # the governor lowers quality if we can't produce frames (and the updates between them) in time
+        self._governor = QualityGovernor(self._render_period.total_seconds())
 
         # delta time between simulation steps
-        self._dt = 1.0 / desired_fps
+        self._dt = 1.0 / desired_lps
 
         # the colour the screen clears to before each frame is rendered
         self._clear_colour = 0, 0, 0
+        # the areas of the screen drawn to in the last frame, so they can be cleared when
+        # only redrawing what changed (see _render_graphics())
+        self._drawn_areas = []
         # the position of the game camera
         self._camera_pos = 0, 0
 
-        # initialise pygame and create the window
-        pygame.init()
-        flags = 0
-        if self._fullscreen:
-            flags = flags or pygame.FULLSCREEN
-        self._screen = pygame.display.set_mode(self._resolution, flags)
+        # records frames to disk if asked to
+        self._recorder = None
+        if capture_path is not None:
+            self._recorder = FrameRecorder(capture_path, capture_format)
+
+        # reads the player's controls once per simulation update (after pygame is initialised, to find joysticks)
+        self._input = InputSampler()
 
     def __del__(self):
         """destructor that cleans up pygame when the game shuts down"""
@@ -87,18 +127,80 @@ class Game(object):
     def run(self):
         """method called to execute the game until it is exited"""
         self._running = True
-        # infinitely run the game until some code sets the running flag to false
+        try:
+            # infinitely run the game until some code sets the running flag to false
+            while self._running:
+                # handle any input events (keyboard, mouse, joystick, window...)
+                self._handle_events()
+                # update the simulation if it's time to
+                self._think()
+                # draw a new frame if it's time to
+                self._render()
+                # print statistics if it's time to
+                self._stats()
+        finally:
+            # tidy up even if the game crashed, so anything recorded up to that point is still usable
+            self._running = False
+            self._finish()
+
+    async def run_async(self):
+        """alternative to run() for use with asyncio, which runs the game as coroutines that sleep until they
+        are next due rather than busy waiting, so other coroutines can share the event loop"""
+        self._running = True
+        tasks = [
+            asyncio.ensure_future(self._schedule(self._logic_ticker, self._handle_events, self._think)),
+            asyncio.ensure_future(self._schedule(self._render_ticker, self._render)),
+            asyncio.ensure_future(self._schedule(self._stats_ticker, self._stats)),
+        ]
+        # the loops all stop once the game is exited, but don't wait for the slower ones to wake up and notice
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            # a loop only finishes early because it failed or because the game was exited, so pass on any
+            # failure to our caller rather than quietly stopping
+            for task in done:
+                task.result()
+            if self._running:
+                raise Exception("game loop stopped while the game was still running")
+        finally:
+            self._running = False
+            self._finish()
+
+    async def _schedule(self, ticker, *behaviours):
+        """coroutine that repeatedly runs the given behaviours then sleeps until the ticker is next due,
+        until the game is exited"""
         while self._running:
-            # handle any input events (keyboard, mouse, joystick, window...)
-            self._handle_events()
-            # while it's time to think, update the simulation (uses loop to 'catch up' if ever behind somehow)
-            while self._logic_ticker.tick(self._run_simulation):
-                pass
-            # if it's time to render, draw a new frame, don't accumulate error on rendering
-            # because we'd rather drop frames on a bad computer than have the simulation degrade
-            self._render_ticker.tick(self._render_graphics, accumulate=False)
-            # if it's time to print statistics, do that
-            self._stats_ticker.tick(self._display_stats)
+            for behaviour in behaviours:
+                behaviour()
+            await asyncio.sleep(ticker.seconds_until_next_tick())
+
+    def _think(self):
+        """while it's time to think, update the simulation (uses loop to 'catch up' if ever behind somehow)"""
+        catch_up_ticks = 0
+        while self._logic_ticker.tick(self._governed_simulation):
+            catch_up_ticks += 1
+            # if we're so far behind that catching up would stop us drawing anything, give up on
+            # the missed updates and let the simulation run slow instead
+            if catch_up_ticks >= self._governor.max_catch_up_ticks:
+                self._logic_ticker.skip_missed()
+                break
+
+    def _render(self):
+        """if it's time to render, draw a new frame, don't accumulate error on rendering because we'd
+        rather drop frames on a bad computer than have the simulation degrade"""
+        self._render_ticker.tick(self._governed_render, accumulate=False)
+
+    def _stats(self):
+        """if it's time to print statistics, do that"""
+        self._stats_ticker.tick(self._display_stats)
+
+    def _finish(self):
+        """tidies up once the game has been exited"""
+        # make sure every recorded frame makes it to disk
+        if self._recorder is not None:
+            self._recorder.close()
 
     def _reset_game(self):
         """used to reset the game to starting state, for when the player dies!"""
@@ -106,28 +208,23 @@ class Game(object):
         self._score = 0
         # reset game difficulty
         self._current_difficulty = self._default_difficulty
-        # tell the enemy controller to die, which will automatically trigger the "next level" code!
-        self._enemies.die()
+        # start again from the first level
+        self._start_level()
         # move player to starting position
         self._player.recenter()
 
     def _start_level(self):
         """sets up a level of the game"""
-        self._enemies = EnemyController(
-            self._resolution,
+        self._enemies.reset(
             self._current_difficulty.speed,
             self._current_difficulty.max_speed,
-            self._enemy_shoot,
-            advance_speed=self._current_difficulty.advance_rate
+            self._current_difficulty.advance_rate
         )
-        self._enemies.populate(self._rows, self._columns, self._xspacing, self._yspacing, self._enemy_sprite)
-        self._enemies.set_death_callback(self._next_level)
         self._current_difficulty = DifficultySettings(
-            self._current_difficulty.speed + 0.5,
+            self._current_difficulty.speed + 50,
             self._current_difficulty.max_speed,
             self._current_difficulty.advance_rate
         )
-        self._entities.add(self._enemies)
 
     def _handle_events(self):
         """handles all OS events"""
@@ -140,37 +237,103 @@ class Game(object):
         # if it's the quit event, set the running flag to false, exiting the game loop (see run() method above)
         if event.type == pygame.QUIT:
             self._running = False
+        # if a joystick is plugged in or removed, make sure we're listening to the right ones
+        elif event.type in (pygame.JOYDEVICEADDED, pygame.JOYDEVICEREMOVED):
+            self._input.refresh_joysticks()
 
     def _run_simulation(self):
         """updates the game's simulation/model"""
+        # read the controls just once, everything in this update sees the same input
+        controls = self._input.sample()
         # update all entities
-        self._entities.think(self._dt)
+        self._player.think(self._dt, controls)
+        self._enemies.think(self._dt)
+        systems.move(self._player_bullets, self._dt)
+        systems.move(self._enemy_bullets, self._dt)
         # see if any player bullets hit any enemies
-        self._player_bullets.check_collisions(
-            self._enemies,
-            self._enemy_shot_by_bullet
+        systems.collide(
+            self._player_bullets,
+            self._enemies.entities,
+            self._events,
+            events.ENEMY_SHOT
         )
         # see if any enemy bullets hit the player
-        self._enemy_bullets.check_collision_single(
-            self._player,
-            self._player_shot_by_bullet
+        systems.collide(
+            self._enemy_bullets,
+            self._player.entities,
+            self._events,
+            events.PLAYER_SHOT
         )
         # see if the enemies have reached the player
-        self._enemies.check_collision_single(
-            self._player,
-            self._player_reached_by_enemies
+        systems.collide(
+            self._enemies.entities,
+            self._player.entities,
+            self._events,
+            events.PLAYER_REACHED
         )
+        # now everything has moved, deal with the consequences
+        self._events.dispatch()
+        # any bullets that leave the visible screen are gone for good - this waits until their hits have been
+        # dealt with, as a bullet can hit something and leave the screen in the same update
+        bounds = pygame.Rect(self._camera_pos, self._resolution)
+        systems.cull(self._player_bullets, bounds)
+        systems.cull(self._enemy_bullets, bounds)
+        self._events.dispatch()
+        # if the player lost, start again, otherwise once every enemy is dead, move on
+        if self._player_has_lost:
+            self._player_has_lost = False
+            self._reset_game()
+        elif self._enemies.entities.count() == 0:
+            self._next_level()
+
+    def _governed_simulation(self):
+        """updates the game's simulation/model, telling the governor how long it took"""
+        started = datetime.datetime.now()
+        self._run_simulation()
+        self._governor.record_tick((datetime.datetime.now() - started).total_seconds())
+
+    def _governed_render(self):
+        """renders a new frame, telling the governor how long it took and applying any change in quality"""
+        started = datetime.datetime.now()
+        self._render_graphics()
+        if self._recorder is not None:
+            self._recorder.capture(self._screen)
+        if self._governor.record_frame((datetime.datetime.now() - started).total_seconds()):
+            self._apply_quality()
+
+    def _apply_quality(self):
+        """configures the game to match the quality level chosen by the governor"""
+        print("quality level: {}".format(self._governor.level))
+        animation_period_scale = self._governor.animation_period_scale
+        self._player.set_animation_period_scale(animation_period_scale)
+        self._enemies.set_animation_period_scale(animation_period_scale)
+        self._player_bullets.set_animation_period_scale(animation_period_scale)
+        self._enemy_bullets.set_animation_period_scale(animation_period_scale)
+        self._stats_ticker.set_period(self._stats_period * self._governor.hud_period_scale)
+        self._render_ticker.set_period(self._render_period * self._governor.frame_period_scale)
 
     def _render_graphics(self):
         """renders a new frame to draw to the screen"""
-        self._screen.fill(self._clear_colour)
-        # create a rectangle to describe the visible game window ("what the camera can see")
-        bounds = pygame.Rect(self._camera_pos, self._resolution)
-        # tell all entities to draw to the screen based on what the camera can see
-        self._entities.render(bounds, self._screen)
+        partial = self._governor.partial_redraw
+        if partial:
+            # only clear where things were drawn last frame, nothing else has changed
+            for area in self._drawn_areas:
+                self._screen.fill(self._clear_colour, area)
+        else:
+            self._screen.fill(self._clear_colour)
+        # draw all entities to the screen
+        drawn_areas = systems.render(self._player.entities, self._screen)
+        drawn_areas += systems.render(self._enemies.entities, self._screen)
+        drawn_areas += systems.render(self._player_bullets, self._screen)
+        drawn_areas += systems.render(self._enemy_bullets, self._screen)
         # TODO: render scores here...
         # tell pygame to commit what we've drawn to the screen
-        pygame.display.flip()
+        if partial:
+            # just the areas that were cleared or drawn over
+            pygame.display.update(self._drawn_areas + drawn_areas)
+        else:
+            pygame.display.flip()
+        self._drawn_areas = drawn_areas
 
     def _display_stats(self):
         """displays new game statistics to the console (and title bar)"""
@@ -180,53 +343,70 @@ class Game(object):
             fps, lps
         )
         print("stats: {}".format(stats_string))
+        cache = self._resources.stats()
+        print("image cache: hits={} misses={} evictions={} bytes={}".format(
+            cache.hits, cache.misses, cache.evictions, cache.bytes_resident
+        ))
+        if self._recorder is not None:
+            capture = self._recorder.stats()
+            print("capture: written={} dropped={} overhead={:.2f}ms/frame".format(
+                capture.written, capture.dropped, capture.overhead * 1000.0
+            ))
+        event_counts = self._events.take_counts()
+        print("events: {}".format(" ".join(
+            "{}={}".format(kind, count) for kind, count in sorted(event_counts.items())
+        )))
         pygame.display.set_caption("Cage Match ({}) - Score: {} Highscore: {}".format(
             stats_string, self._score, self._highscore
         ))
 
     def _player_shoot(self, bullet_origin, death_callback):
         """callback passed to the Player to enable them to fire projectiles"""
-        speed = 7
-        projectile = Projectile(bullet_origin, (0, -speed), (255, 255, 0), self._player_bullet_sprite)
-        projectile.set_death_callback(death_callback)
-        self._player_bullets.add(projectile)
+        speed = 700
+        self._player_bullets.fire(bullet_origin, (0, -speed), death_callback)
 
     def _enemy_shoot(self, bullet_origin, death_callback):
         """callback passed to the EnemyController to enable enemies to fire projectiles"""
-        speed = 3
-        projectile = Projectile(bullet_origin, (0, speed), (255, 255, 255), self._enemy_bullet_sprite)
-        projectile.set_death_callback(death_callback)
-        self._enemy_bullets.add(projectile)
-
-    def _next_level(self, enemy_controller):
-        """callback called when all enemies are dead"""
-        _ = enemy_controller
+        speed = 300
+        self._enemy_bullets.fire(bullet_origin, (0, speed), death_callback)
+
+    def _next_level(self):
+        """called when all enemies are dead"""
         print("next level")
         self._start_level()
 
+    def _entity_died(self, death_callback, row):
+        """event handler for any entity dying, passes the news on to whoever asked to hear about it"""
+        death_callback(row)
+
     def _player_reached_by_enemies(self, enemy, player):
+        """event handler for an enemy reaching the player"""
         _ = enemy, player
         self._player_lost()
 
     def _player_shot_by_bullet(self, bullet, player):
-        """callback for an enemy being shot by a bullet"""
+        """event handler for the player being shot by a bullet"""
         _ = player
         # remove the offending bullet
-        bullet.die()
+        self._enemy_bullets.kill(bullet)
         self._player_lost()
 
     def _player_lost(self):
         """called when the player has lost the game somehow"""
-        print("player loses!")
-
-        # reset the game to starting state
-        self._reset_game()
+        # only lose once, however many things hit the player at the same time
+        if not self._player_has_lost:
+            print("player loses!")
+            # the game is reset to starting state after all events are handled
+            self._player_has_lost = True
 
     def _enemy_shot_by_bullet(self, bullet, enemy):
-        """callback for an enemy being shot by a bullet"""
+        """event handler for an enemy being shot by a bullet"""
+        # several bullets can hit the same enemy at once, but only the first one counts
+        if not (self._player_bullets.alive[bullet] and self._enemies.entities.alive[enemy]):
+            return
         # remove bullet and enemy, simples!
-        bullet.die()
-        enemy.die()
+        self._player_bullets.kill(bullet)
+        self._enemies.entities.kill(enemy)
         # everyone likes points
         self._score += 100
         self._highscore = max(self._highscore, self._score)
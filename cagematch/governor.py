@@ -0,0 +1,121 @@
+"""this file implements a governor that trades visual quality for speed when the game can't keep up"""
+import collections
+
+
+class QualityGovernor(object):
+    """watches how long frames and simulation updates take compared to a time budget, stepping
+    quality down when over budget and back up again when there is time to spare"""
+
+    # quality levels, from best to worst, each level includes the savings of the levels before it
+    FULL = 0
+    # only the parts of the screen that changed are redrawn, which is what saves time at this level -
+    # animations also change frame less often and the statistics/score display is refreshed less often,
+    # but those make little difference to how long frames take
+    REDUCED_DETAIL = 1
+    # fewer frames are drawn per second
+    REDUCED_FRAME_RATE = 2
+
+    def __init__(self, frame_budget, samples=30, step_down_ratio=1.0, step_up_ratio=0.6, max_catch_up_ticks=5,
+                 retry_windows=10):
+        """constructor, frame_budget is the number of seconds available to produce each frame at full quality"""
+        # store parameters
+        self._frame_budget = frame_budget
+        self._samples = samples
+        self._step_down_ratio = step_down_ratio
+        self._step_up_ratio = step_up_ratio
+        self._max_catch_up_ticks = max_catch_up_ticks
+        self._retry_windows = retry_windows
+        # the current quality level
+        self._level = QualityGovernor.FULL
+        # time spent on simulation updates since the last frame was drawn
+        self._pending_tick_time = 0.0
+        # recent measurements of how long drawing each frame took, and the simulation updates before it
+        self._render_times = collections.deque(maxlen=samples)
+        self._tick_times = collections.deque(maxlen=samples)
+        # the average time drawing a frame took when we were last at each level
+        self._render_costs = {}
+        # how many sets of measurements in a row have been judged too close to budget to step up
+        self._windows_held = 0
+
+    @property
+    def level(self):
+        """the current quality level"""
+        return self._level
+
+    @property
+    def max_catch_up_ticks(self):
+        """the most simulation updates that should be run between two frames before giving up on catching up"""
+        return self._max_catch_up_ticks
+
+    @property
+    def partial_redraw(self):
+        """whether only the parts of the screen that changed should be redrawn"""
+        return self._level >= QualityGovernor.REDUCED_DETAIL
+
+    @property
+    def animation_period_scale(self):
+        """how much to stretch the period of animations by"""
+        return 2.0 if self._level >= QualityGovernor.REDUCED_DETAIL else 1.0
+
+    @property
+    def hud_period_scale(self):
+        """how much to stretch the time between refreshes of the statistics/score display by"""
+        return 3.0 if self._level >= QualityGovernor.REDUCED_DETAIL else 1.0
+
+    @property
+    def frame_period_scale(self):
+        """how much to stretch the time between frames by"""
+        return QualityGovernor._frame_period_scale_at(self._level)
+
+    def record_tick(self, seconds):
+        """records how long a simulation update took"""
+        self._pending_tick_time += seconds
+
+    def record_frame(self, seconds):
+        """records how long drawing a frame took, returning whether the quality level changed as a result"""
+        self._render_times.append(seconds)
+        self._tick_times.append(self._pending_tick_time)
+        self._pending_tick_time = 0.0
+        # wait for a full set of measurements before judging, so one slow frame doesn't change anything
+        if len(self._render_times) < self._samples:
+            return False
+        render = sum(self._render_times) / len(self._render_times)
+        ticks = sum(self._tick_times) / len(self._tick_times)
+        self._render_costs[self._level] = render
+        previous_level = self._level
+        if render + ticks > self._budget_at(self._level) * self._step_down_ratio:
+            self._level = min(self._level + 1, QualityGovernor.REDUCED_FRAME_RATE)
+        elif self._level > QualityGovernor.FULL:
+            self._consider_stepping_up(render, ticks)
+        if self._level != previous_level:
+            self._windows_held = 0
+        # start measuring afresh, so the effect of this decision is judged separately
+        self._render_times.clear()
+        self._tick_times.clear()
+        return self._level != previous_level
+
+    def _consider_stepping_up(self, render, ticks):
+        """steps quality up if the level above is predicted to fit comfortably within its own budget"""
+        target = self._level - 1
+        # drawing costs what it did when we were last at that level, and as the simulation runs at a fixed
+        # rate, the time spent on updates between frames changes with the time between frames
+        ticks_scale = QualityGovernor._frame_period_scale_at(target) / self.frame_period_scale
+        predicted = self._render_costs.get(target, render) + ticks * ticks_scale
+        if predicted < self._budget_at(target) * self._step_up_ratio:
+            self._level = target
+            return
+        # the remembered cost may be out of date if the game has got lighter since, so every so often
+        # forget it, letting the next judgement try the level above using what drawing costs now
+        self._windows_held += 1
+        if self._windows_held >= self._retry_windows:
+            self._render_costs.pop(target, None)
+            self._windows_held = 0
+
+    def _budget_at(self, level):
+        """the time available for each frame (and the updates before it) at the given level"""
+        return self._frame_budget * QualityGovernor._frame_period_scale_at(level)
+
+    @staticmethod
+    def _frame_period_scale_at(level):
+        """how much the time between frames is stretched by at the given level"""
+        return 2.0 if level >= QualityGovernor.REDUCED_FRAME_RATE else 1.0
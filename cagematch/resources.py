@@ -1,20 +1,99 @@
 """this file manages the retrieving of content resources like images from disk"""
 
 
+from collections import namedtuple, OrderedDict
 import zipfile
 import pygame
 import io
 
 
+# statistics describing how well the image cache is doing
+CacheStats = namedtuple('CacheStats', 'hits misses evictions bytes_resident')
+
+
 class Resources(object):
-    def __init__(self, asset_pack_path):
+    """provides access to the resources in an asset pack, keeping recently used images decoded in memory"""
+
+    def __init__(self, asset_pack_path, cache_budget=64 * 1024 * 1024):
+        """constructor, cache_budget is the most bytes of decoded images to keep in memory"""
         self._path = asset_pack_path
         self._handle = zipfile.ZipFile(self._path)
+        self._cache_budget = cache_budget
+        # decoded images by resource name, least recently used first
+        self._images = OrderedDict()
+        # the names of images that have been converted to the display's pixel format
+        self._converted = set()
+        # cache statistics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_resident = 0
 
     def get(self, resource_name):
         return self._handle.open(resource_name)
 
     def get_image(self, resource_name):
+        """returns the named image, decoding it only if it isn't already in the cache"""
+        image = self._images.get(resource_name)
+        if image is None:
+            self._misses += 1
+            image = self._load_image(resource_name)
+        else:
+            self._hits += 1
+            self._images.move_to_end(resource_name)
+        # images loaded before the window was created couldn't be converted then, so try again now
+        if resource_name not in self._converted:
+            image = self._convert(resource_name, image)
+        return image
+
+    def prefetch(self, resource_names):
+        """hints that the named images will be needed soon, decoding any that aren't already cached"""
+        for resource_name in resource_names:
+            if resource_name not in self._images:
+                # decoding ahead of time is still a decode, so it counts as a miss
+                self._misses += 1
+                self._convert(resource_name, self._load_image(resource_name))
+
+    def stats(self):
+        """returns statistics describing how well the image cache is doing"""
+        return CacheStats(self._hits, self._misses, self._evictions, self._bytes_resident)
+
+    def _load_image(self, resource_name):
+        """decodes the named image and stores it in the cache"""
         resource_stream = self.get(resource_name)
         stream = io.BytesIO(resource_stream.read())
-        return pygame.image.load(stream, resource_name)
+        image = pygame.image.load(stream, resource_name)
+        self._store(resource_name, image)
+        return image
+
+    def _convert(self, resource_name, image):
+        """converts a cached image to the display's pixel format so drawing it is faster, if there is a display yet"""
+        if pygame.display.get_surface() is None:
+            return image
+        if image.get_flags() & pygame.SRCALPHA:
+            converted = image.convert_alpha()
+        else:
+            converted = image.convert()
+        self._store(resource_name, converted)
+        self._converted.add(resource_name)
+        return converted
+
+    def _store(self, resource_name, image):
+        """puts an image in the cache as the most recently used, replacing any image of the same name and
+        evicting old images if over budget"""
+        previous = self._images.pop(resource_name, None)
+        if previous is not None:
+            self._bytes_resident -= Resources._image_bytes(previous)
+        self._images[resource_name] = image
+        self._bytes_resident += Resources._image_bytes(image)
+        # evict the least recently used images until we're within budget, but always keep the newest
+        while self._bytes_resident > self._cache_budget and len(self._images) > 1:
+            evicted_name, evicted = self._images.popitem(last=False)
+            self._converted.discard(evicted_name)
+            self._bytes_resident -= Resources._image_bytes(evicted)
+            self._evictions += 1
+
+    @staticmethod
+    def _image_bytes(image):
+        """how much memory a decoded image takes up"""
+        return image.get_pitch() * image.get_height()
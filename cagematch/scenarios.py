@@ -0,0 +1,259 @@
+"""this file runs scripted scenarios through the real game loop to catch whole-game performance regressions
+
+run it with "python -m cagematch.scenarios", see --help for options"""
+from .entities import Player
+from .controls import InputFrame
+from .governor import QualityGovernor
+from .game import Game, Formation, DEFAULT_FORMATION
+from collections import namedtuple
+import tracemalloc
+import argparse
+import gc
+import datetime
+import random
+import json
+import sys
+import os
+
+
+# a scripted scenario: controls is a function from tick number to InputFrame, setup is called with the
+# game before it runs and every_tick is called with the game and tick number before each simulation update
+Scenario = namedtuple('Scenario', 'name seed formation controls setup every_tick')
+
+
+def _weave(tick, shoot):
+    """controls that sweep the player back and forth across the screen"""
+    return InputFrame(1.0 if (tick // 60) % 2 else -1.0, shoot)
+
+
+SCENARIOS = [
+    # lots of enemies on screen, but nobody shoots
+    Scenario(
+        "dense_formation", 1, Formation(8, 14, 64, 48),
+        controls=lambda tick: _weave(tick, False),
+        setup=lambda game: game.set_enemy_shooting(0, 0.0),
+        every_tick=None,
+    ),
+    # the player fires as fast as allowed while lots of enemies fire back
+    Scenario(
+        "bullet_hell", 2, DEFAULT_FORMATION,
+        controls=lambda tick: _weave(tick, True),
+        setup=lambda game: game.set_bullet_hell(),
+        every_tick=None,
+    ),
+    # every enemy dies every half a second, so levels are constantly being set up
+    Scenario(
+        "rapid_level_clears", 3, DEFAULT_FORMATION,
+        controls=lambda tick: _weave(tick, True),
+        setup=None,
+        every_tick=lambda game, tick: game.clear_level() if tick % 30 == 29 else None,
+    ),
+    # the player dies every two seconds, so the game is constantly being reset
+    Scenario(
+        "player_deaths", 4, DEFAULT_FORMATION,
+        controls=lambda tick: _weave(tick, True),
+        setup=None,
+        every_tick=lambda game, tick: game.lose() if tick % 120 == 119 else None,
+    ),
+]
+
+
+class ScriptedInput(object):
+    """stands in for the InputSampler, producing controls from a script rather than the keyboard or joysticks"""
+
+    def __init__(self, script):
+        """constructor, script is a function from tick number to InputFrame"""
+        self._script = script
+        self._tick = 0
+
+    def refresh_joysticks(self):
+        """scripted input has no joysticks"""
+        pass
+
+    def sample(self):
+        """produces the scripted controls for the current tick"""
+        frame = self._script(self._tick)
+        self._tick += 1
+        return frame
+
+
+class ScenarioGame(Game):
+    """the real game, driven by a scenario for a fixed number of simulation updates while timing each one"""
+
+    def __init__(self, scenario, ticks, asset_path):
+        """constructor"""
+        # fix the seed before the game starts, as setting up the first level is already random
+        random.seed(scenario.seed)
+        super().__init__((1024, 768), False, asset_path, formation=scenario.formation)
+        # keep the game at full quality and never skip simulation updates, so that every run of a scenario
+        # does the same work and measurements can be compared from one run to the next
+        self._governor = QualityGovernor(
+            self._render_period.total_seconds(), step_down_ratio=float("inf"), max_catch_up_ticks=sys.maxsize
+        )
+        self._scenario = scenario
+        self._ticks = ticks
+        self._tick_times = []
+        self._input = ScriptedInput(scenario.controls)
+        if scenario.setup is not None:
+            scenario.setup(self)
+
+    def set_enemy_shooting(self, max_flying_bullets, shots_per_second):
+        """changes how much the enemies shoot"""
+        self._enemies.set_shooting(max_flying_bullets, shots_per_second)
+
+    def set_bullet_hell(self):
+        """makes both the player and enemies shoot as much as possible"""
+        self._player.set_shooting_type(Player.FIRE_RATE)
+        self.set_enemy_shooting(50, 30.0)
+
+    def clear_level(self):
+        """kills every enemy, as though they were all shot at once"""
+        for row in self._enemies.entities.rows():
+            self._enemies.entities.kill(row)
+
+    def lose(self):
+        """makes the player lose, as though they were shot"""
+        self._player_lost()
+
+    def measure(self):
+        """runs the scenario through the game loop and returns its timing measurements"""
+        # ticks_per_second() measures since it was last called, so start measuring from now
+        self._render_ticker.ticks_per_second()
+        self._logic_ticker.ticks_per_second()
+        self.run()
+        tick_times = sorted(self._tick_times)
+        return {
+            "fps": self._render_ticker.ticks_per_second(),
+            "lps": self._logic_ticker.ticks_per_second(),
+            "ticks": len(tick_times),
+            "tick_ms_p50": ScenarioGame._percentile(tick_times, 50) * 1000.0,
+            "tick_ms_p95": ScenarioGame._percentile(tick_times, 95) * 1000.0,
+            "tick_ms_p99": ScenarioGame._percentile(tick_times, 99) * 1000.0,
+        }
+
+    def measure_memory(self):
+        """runs the scenario through the game loop and returns the most memory it had allocated at once (in KiB)"""
+        tracemalloc.start()
+        try:
+            self.run()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak_memory / 1024.0
+
+    def _run_simulation(self):
+        """updates the simulation as normal, but timed and with the scenario's extra behaviour"""
+        tick = len(self._tick_times)
+        started = datetime.datetime.now()
+        if self._scenario.every_tick is not None:
+            self._scenario.every_tick(self, tick)
+        super()._run_simulation()
+        self._tick_times.append((datetime.datetime.now() - started).total_seconds())
+        # stop once the scenario has run its course
+        if len(self._tick_times) >= self._ticks:
+            self._running = False
+
+    @staticmethod
+    def _percentile(ordered, percent):
+        """returns the given percentile of an ordered list of values (nearest rank)"""
+        if not ordered:
+            return 0.0
+        rank = max(int(round(percent / 100.0 * len(ordered))) - 1, 0)
+        return ordered[rank]
+
+
+# how each measurement can regress: higher is worse (1) or lower is worse (-1) - fps and lps are reported but
+# not compared, as the game never runs faster than it's asked to, so they only drop if the machine can't keep up
+REGRESSION_DIRECTIONS = {
+    "tick_ms_p50": 1,
+    "tick_ms_p95": 1,
+    "tick_ms_p99": 1,
+    "peak_memory_kib": 1,
+}
+
+
+def run_scenario(scenario, ticks, asset_path):
+    """runs a single scenario, returning its measurements - it runs twice in fresh games, once timed and
+    once tracing memory, as tracing memory slows the game down too much to time it at the same time"""
+    measurements = _run_in_fresh_game(scenario, ticks, asset_path, ScenarioGame.measure)
+    measurements["peak_memory_kib"] = _run_in_fresh_game(scenario, ticks, asset_path, ScenarioGame.measure_memory)
+    return measurements
+
+
+def _run_in_fresh_game(scenario, ticks, asset_path, measure):
+    """sets up a new game for the scenario and returns what the given measure method makes of running it"""
+    game = ScenarioGame(scenario, ticks, asset_path)
+    result = measure(game)
+    # the game shuts pygame down when it's destroyed, and it's part of reference cycles (through its
+    # callbacks), so make sure that happens now rather than part way through setting up the next game
+    del game
+    gc.collect()
+    return result
+
+
+def compare(report, baseline, tolerance):
+    """compares a report against a baseline, returning a description of every measurement that got worse
+    than the baseline by more than the tolerance (a fraction of the baseline value)"""
+    regressions = []
+    for name, measurements in sorted(report["scenarios"].items()):
+        expected = baseline["scenarios"].get(name)
+        if expected is None:
+            continue
+        for key, direction in sorted(REGRESSION_DIRECTIONS.items()):
+            if key not in expected:
+                continue
+            limit = expected[key] * (1.0 + direction * tolerance)
+            if (measurements[key] - limit) * direction > 0:
+                regressions.append("{}: {} {:.2f} (baseline {:.2f})".format(
+                    name, key, measurements[key], expected[key]
+                ))
+    return regressions
+
+
+def main():
+    """entry point for running the scenarios from the command line"""
+    parser = argparse.ArgumentParser(description="run scripted performance scenarios through the game")
+    parser.add_argument("--assets", default="asset_packs/default.zip", help="asset pack to load")
+    parser.add_argument("--ticks", type=int, default=600, help="simulation updates to run per scenario")
+    parser.add_argument("--only", action="append", help="only run the named scenario (can be repeated)")
+    parser.add_argument("--report", default="scenario_report.json", help="file to write the report to")
+    parser.add_argument("--baseline", default="scenario_baseline.json", help="baseline report to compare against")
+    parser.add_argument("--write-baseline", action="store_true", help="store this run's report as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="fraction a measurement can be worse than the baseline before it's a regression")
+    args = parser.parse_args()
+
+    # scenarios run without a window or sound
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    report = {"ticks": args.ticks, "scenarios": {}}
+    for scenario in SCENARIOS:
+        if args.only and scenario.name not in args.only:
+            continue
+        print("running scenario: {}".format(scenario.name), file=sys.stderr)
+        report["scenarios"][scenario.name] = run_scenario(scenario, args.ticks, args.assets)
+
+    # the report goes to a file rather than being printed, as the game prints as it runs
+    report_text = json.dumps(report, indent=2, sort_keys=True)
+    with open(args.report, "w") as report_file:
+        report_file.write(report_text)
+    print("report written to {}".format(args.report), file=sys.stderr)
+
+    if args.write_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            baseline_file.write(report_text)
+        print("baseline written to {}".format(args.baseline), file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print("regression: {}".format(regression), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+    else:
+        print("no baseline at {}, run with --write-baseline to store one".format(args.baseline), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
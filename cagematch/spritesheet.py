@@ -28,34 +28,54 @@ class SpriteSheet(object):
         self._columns = self._image.get_width() / sprite_size[0]
         self._rows = self._image.get_height() / sprite_size[1]
 
+        # precompute a collision mask for every sprite, so pixel-accurate collision tests are cheap later
+        sprite_count = int(self._columns * self._rows)
+        self._masks = [
+            pygame.mask.from_surface(self._image.subsurface(self._area(sprite_id)))
+            for sprite_id in range(sprite_count)
+        ]
+
     def draw(self, surface, sprite_id, x, y):
-        """method for drawing a particular sprite to a position on the target surface"""
-        # figure out where in the sprite sheet the specified sprite is
-        src_x = int(sprite_id % self._columns) * self._sprite_size[0]
-        src_y = int(sprite_id / self._columns) * self._sprite_size[1]
-        # create a rect for the position to read the sprite from
-        area = pygame.Rect(src_x, src_y, self._sprite_size[0], self._sprite_size[1])
+        """method for drawing a particular sprite to a position on the target surface, returns the area drawn to"""
         # create a rect for the destination to draw to
         dest = pygame.Rect(x, y, self._sprite_size[0], self._sprite_size[1])
         # draw the sprite onto the target surface
-        surface.blit(self._image, dest, area)
+        return surface.blit(self._image, dest, self._area(sprite_id))
+
+    def mask(self, sprite_id):
+        """returns the collision mask of a particular sprite"""
+        return self._masks[sprite_id]
+
+    def _area(self, sprite_id):
+        """returns a rect for the position in the sprite sheet to read a particular sprite from"""
+        # figure out where in the sprite sheet the specified sprite is
+        src_x = int(sprite_id % self._columns) * self._sprite_size[0]
+        src_y = int(sprite_id / self._columns) * self._sprite_size[1]
+        return pygame.Rect(src_x, src_y, self._sprite_size[0], self._sprite_size[1])
 
 
 class Animation(object):
     """keeps a list of frames and manages which frame should be visible"""
+
     def __init__(self, frame_ids, fps, loops=True):
         """constructor"""
         self._frames = frame_ids
         self._fps = fps
         self._period = datetime.timedelta(seconds=1.0/self._fps)
+        # multiplier applied to the period, raising it slows the animation down
+        self._period_scale = 1.0
         self._next_frame = datetime.datetime.now() + self._period
         self._loops = loops
         self._current_frame = 0
 
+    def set_period_scale(self, scale):
+        """sets the multiplier applied to the period of the animation, taking effect from the next frame"""
+        self._period_scale = scale
+
     def reset(self):
         """reset the animation to the beginning"""
         self._current_frame = 0
-        self._next_frame = datetime.datetime.now() + self._period
+        self._next_frame = datetime.datetime.now() + self._period * self._period_scale
 
     def is_done(self):
         """see if this animation has finished, which is only possible if it doesn't loop"""
@@ -67,7 +87,7 @@ class Animation(object):
     def current_sprite_id(self):
         """tells the animation to figure out what sprite ID should be showing currently"""
         while datetime.datetime.now() > self._next_frame:
-            self._next_frame += self._period
+            self._next_frame += self._period * self._period_scale
             self._current_frame += 1
             if self._current_frame >= len(self._frames):
                 if self._loops:
@@ -84,11 +104,20 @@ class AnimatedSpriteSheet(object):
         self._sheet = SpriteSheet(image, sprite_size)
         self._current = Animation([0], 1)
         self._animations = {}
+        self._period_scale = 1.0
 
     def add_animation(self, name, animation):
         """add an animation to this animated sprite sheet"""
+        animation.set_period_scale(self._period_scale)
         self._animations[name] = animation
 
+    def set_period_scale(self, scale):
+        """sets the multiplier applied to the period of every animation on this sprite sheet"""
+        self._period_scale = scale
+        self._current.set_period_scale(scale)
+        for animation in self._animations.values():
+            animation.set_period_scale(scale)
+
     def set_animation(self, name):
         """set the current animation using the name given when added"""
         selected = self._animations[name]
@@ -100,7 +129,12 @@ class AnimatedSpriteSheet(object):
         """the current sprite ID that should be displayed"""
         return self._current.current_sprite_id()
 
+    def current_mask(self):
+        """the collision mask of the sprite that should be displayed"""
+        return self._sheet.mask(self.current_sprite_id())
+
     def draw(self, surface, x, y):
-        """draw the sprite ID indicated by the animation from the spritesheet at the desired position"""
-        self._sheet.draw(surface, self.current_sprite_id(), x, y)
+        """draw the sprite ID indicated by the animation from the spritesheet at the desired position,
+        returns the area drawn to"""
+        return self._sheet.draw(surface, self.current_sprite_id(), x, y)
 
@@ -44,6 +44,22 @@ class Ticker(object):
             ticked = True
         return ticked
 
+    def seconds_until_next_tick(self):
+        """returns how many seconds are left until the next tick is due, or zero if it's already due"""
+        remaining = self._next_tick - datetime.datetime.now()
+        return max(remaining.total_seconds(), 0.0)
+
+    def set_period(self, period):
+        """changes the interval between ticks, taking effect from the next scheduled tick - if the new interval
+        has already passed since the last tick, the next tick is due now rather than overdue"""
+        self._next_tick = max(self._next_tick + period - self._period, datetime.datetime.now())
+        self._period = period
+
+    def skip_missed(self):
+        """abandons any ticks that are overdue, so the next tick is scheduled one period from now
+        instead of trying to catch up on everything that was missed"""
+        self._next_tick = datetime.datetime.now() + self._period
+
     def ticks_per_second(self):
         """asks the ticker how many ticks per second is has done (on average)
         since this function (ticks_per_second()) was last called"""